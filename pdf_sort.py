@@ -14,19 +14,23 @@ import re
 import shutil
 from datetime import datetime
 import sys
-import random
-import string
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import base64
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Optional
 import zipfile
+import tempfile
+import hashlib
+import sqlite3
 import fitz
-import easyocr
-import io
-from PIL import Image
 import numpy as np
 import traceback
 import time
 import argparse
+import threading
+import queue
 from collections import defaultdict
+from tqdm import tqdm
 
 # ANSI escape codes for colors
 BLACK = '\033[30m'
@@ -67,6 +71,72 @@ STATS = {
     'end_time': None
 }
 
+# Shared OCR reader, built on first use so text-only runs never load the models
+_OCR_READER = None
+_OCR_READER_LOCK = threading.Lock()
+
+# Parse cache kept next to the invoices, so re-runs skip parsing and OCR
+CACHE_FILENAME = '.pdf_sort_cache.db'
+_CACHE = None
+_CACHE_LOCK = threading.Lock()
+
+# Target folders already created during this run
+_CREATED_DIRS = set()
+_CREATED_DIRS_LOCK = threading.Lock()
+
+# Pages without text are rendered in grayscale at 1.5x (108 DPI) before OCR
+OCR_RENDER_ZOOM = 1.5
+# At most this many image-only pages are OCR'd per PDF (skips long scanned T&Cs)
+MAX_OCR_PAGES = 3
+
+# OCR batching: images are resized to a uniform size and sent in fixed-size batches
+OCR_BATCH_SIZE = 16
+OCR_BATCH_TIMEOUT = 0.2  # seconds to wait for a batch to fill up
+OCR_IMAGE_WIDTH = 800
+OCR_IMAGE_HEIGHT = 1000
+
+# Date patterns paired with the strptime format used to parse their match
+_DATE_FORMATS = [
+    # Four-digit year formats (YYYY)
+    (r'(0[1-9]|[1-2][0-9]|3[01])/(0[1-9]|1[0-2])/(20[0-9]{2})', '%d/%m/%Y'),
+    (r'(0[1-9]|[1-2][0-9]|3[01])\.(0[1-9]|1[0-2])\.(20[0-9]{2})', '%d.%m.%Y'),
+    (r'(0[1-9]|[1-2][0-9]|3[01])[\s](0[1-9]|1[0-2])[\s](20[0-9]{2})', '%d %m %Y'),
+    (r'(0[1-9]|[1-2][0-9]|3[01])-(0[1-9]|1[0-2])-(20[0-9]{2})', '%d-%m-%Y'),
+    (r'(20[0-9]{2})-(0[1-9]|1[0-2])-(0[1-9]|[12][0-9]|3[01])', '%Y-%m-%d'),
+    # Two-digit year formats (YY)
+    (r'(0[1-9]|[1-2][0-9]|3[01])/(0[1-9]|1[0-2])/([0-9]{2})(?=[\s\-:]|$)', '%d/%m/%y'),
+    (r'(0[1-9]|[1-2][0-9]|3[01])\.(0[1-9]|1[0-2])\.([0-9]{2})(?=[\s\-:]|$)', '%d.%m.%y'),
+    (r'(0[1-9]|[1-2][0-9]|3[01])[\s](0[1-9]|1[0-2])[\s]([0-9]{2})(?=[\s\-:]|$)', '%d %m %y'),
+    (r'(0[1-9]|[1-2][0-9]|3[01])-(0[1-9]|1[0-2])-([0-9]{2})(?=[\s\-:]|$)', '%d-%m-%y'),
+    # Month name formats
+    (r'(0[1-9]|[1-2][0-9]|3[01])\s[A-Za-z]{3}\.?\s(20[0-9]{2})', '%d %b %Y'),
+    (r'(?:January|February|March|April|May|June|July|August|September|October|November|December)'
+     r'\s(0[1-9]|1[0-2]),\s(20[0-9]{2})', '%B %d, %Y'),
+]
+
+# All date patterns fused into one alternation so the text is scanned once;
+# the named group that matched tells which strptime format applies. Case is
+# ignored because page text is lower-cased before scanning (strptime's %b/%B
+# accept any case)
+_DATE_PATTERN = re.compile(
+    '|'.join(f'(?P<date{i}>{pattern})' for i, (pattern, _) in enumerate(_DATE_FORMATS)),
+    re.IGNORECASE
+)
+_DATE_FORMAT_BY_GROUP = {f'date{i}': fmt for i, (_, fmt) in enumerate(_DATE_FORMATS)}
+_DATE_GROUP_INDEX = {f'date{i}': i for i in range(len(_DATE_FORMATS))}
+
+# Keywords that identify an invoice, on top of those given on the command line
+DESIRED_KEYWORDS = ["facture", "invoice", "rechnung", "facturation", "repas"]
+# Phrases that mark a document as explicitly not an invoice
+UNDESIRED_KEYWORDS = ["ceci n'est pas une facture"]
+
+# Year folders (2000-2099) are skipped when scanning for PDFs
+_YEAR_PATTERN = re.compile(r'^20\d{2}$')
+
+# Pipeline sizing: parse workers feed the OCR batcher, which feeds the movers
+PIPELINE_QUEUE_SIZE = 64
+MOVE_WORKERS = 4
+
 
 def print_banner():
     banner = f"""
@@ -102,6 +172,7 @@ def print_help():
     -d, --dry-run       Preview actions without moving files
     --version           Show version information
     --stats             Show detailed statistics at the end
+    --no-cache          Ignore the parse cache (.pdf_sort_cache.db, never used in dry runs)
 
 {BOLD_WHITE}ARGUMENTS:{RESET}
     YEAR                Optional: Filter by specific year (e.g., 2023)
@@ -153,12 +224,14 @@ def print_help():
     • easyocr
     • Pillow (PIL)
     • numpy
+    • tqdm
 
 {BOLD_WHITE}NOTES:{RESET}
     • OCR is automatically triggered for image-based PDFs
     • Duplicate filenames get a random suffix
     • Empty folders are cleaned up automatically
     • Multi-threaded processing for better performance
+    • Parse results are cached in .pdf_sort_cache.db so re-runs skip OCR
 """
     print(help_text)
 
@@ -166,7 +239,124 @@ def print_help():
 def verbose_print(message, color=""):
 
     if VERBOSE:
-        print(f"{color}{message}{RESET}")
+        # tqdm.write keeps messages from breaking the progress bar
+        tqdm.write(f"{color}{message}{RESET}")
+
+
+def wrap_fp16_recognizer(recognizer):
+    """Wrap EasyOCR's recognizer so it runs under CUDA float16 autocast.
+
+    Only the recognizer is wrapped: the detector's score maps are passed to
+    OpenCV, which rejects float16 arrays. Outputs are cast back to float32
+    so EasyOCR's decoding sees the dtype it expects.
+    """
+    import torch
+
+    class FP16Recognizer(torch.nn.Module):
+
+        def __init__(self):
+            super().__init__()
+            self.recognizer = recognizer
+
+        def forward(self, *args, **kwargs):
+            with torch.autocast('cuda', dtype=torch.float16):
+                output = self.recognizer(*args, **kwargs)
+            return output.float()
+
+    return FP16Recognizer()
+
+
+def get_ocr_reader():
+    """Return the shared EasyOCR reader, creating it on first call.
+
+    torch and easyocr are imported here rather than at module level, so the
+    parse worker processes, which only need PyMuPDF, never load them.
+    """
+    global _OCR_READER
+    if _OCR_READER is None:
+        with _OCR_READER_LOCK:
+            if _OCR_READER is None:
+                import easyocr
+                import torch
+
+                use_gpu = torch.cuda.is_available()
+                verbose_print(f"  → Loading OCR models ({'GPU' if use_gpu else 'CPU'})...", MAGENTA)
+                # On CPU, EasyOCR's default quantize=True already runs the recognizer in int8
+                reader = easyocr.Reader(['en'], gpu=use_gpu, cudnn_benchmark=True)
+                if use_gpu:
+                    reader.recognizer = wrap_fp16_recognizer(reader.recognizer)
+                    # Let cudnn pick its kernels for the batch shape before real work starts
+                    warmup = list(np.zeros([OCR_BATCH_SIZE, OCR_IMAGE_HEIGHT, OCR_IMAGE_WIDTH], np.uint8))
+                    reader.readtext_batched(warmup, n_width=OCR_IMAGE_WIDTH, n_height=OCR_IMAGE_HEIGHT)
+                _OCR_READER = reader
+    return _OCR_READER
+
+
+class OCRBatcher:
+    """Collect OCR requests from all workers and run them through readtext_batched.
+
+    Workers call submit() and wait on the returned Future, while a single
+    consumer thread groups pending images into batches of up to batch_size,
+    waiting at most timeout seconds for a batch to fill.
+    """
+
+    def __init__(self, batch_size=OCR_BATCH_SIZE, timeout=OCR_BATCH_TIMEOUT, maxsize=PIPELINE_QUEUE_SIZE):
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = threading.Thread(target=self._run, name="ocr-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, filepath, page_index, image):
+        """Queue an image for OCR; the Future resolves to the recognized text."""
+        future = Future()
+        self._queue.put((filepath, page_index, image, future))
+        return future
+
+    def close(self):
+        """Flush pending requests and stop the consumer thread."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        finished = False
+        while not finished:
+            item = self._queue.get()
+            if item is None:
+                break
+
+            batch = [item]
+            deadline = time.monotonic() + self.timeout
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    finished = True
+                    break
+                batch.append(item)
+
+            self._process_batch(batch)
+
+    def _process_batch(self, batch):
+        verbose_print(f"  → OCR batch of {len(batch)} image(s)", MAGENTA)
+        try:
+            results = get_ocr_reader().readtext_batched(
+                [image for _, _, image, _ in batch],
+                n_width=OCR_IMAGE_WIDTH, n_height=OCR_IMAGE_HEIGHT,
+                detail=0, paragraph=True
+            )
+        except Exception as e:
+            for _, _, _, future in batch:
+                future.set_exception(e)
+            return
+
+        for (_, _, _, future), result in zip(batch, results):
+            future.set_result(' '.join(result))
 
 
 def extract_month_from_french(text):
@@ -186,55 +376,52 @@ def extract_month_from_french(text):
     return None
 
 
-def extract_date_from_text(text):
+def extract_numeric_date(text):
+    """Return (month, year) of the valid numeric date whose format comes first in _DATE_FORMATS, or (None, None).
 
+    Format priority is what keeps phone numbers and SIRET groups ("01 02 03 04 05")
+    from beating a later dd/mm/yyyy date; within one format the earliest date wins.
+    """
     current_year = datetime.now().year
     min_year = 1900
     max_year = current_year + 1
 
-    date_formats = [
-        # Four-digit year formats (YYYY)
-        r'(0[1-9]|[1-2][0-9]|3[01])/(0[1-9]|1[0-2])/(20[0-9]{2})',
-        r'(0[1-9]|[1-2][0-9]|3[01])\.(0[1-9]|1[0-2])\.(20[0-9]{2})',
-        r'(0[1-9]|[1-2][0-9]|3[01])[\s](0[1-9]|1[0-2])[\s](20[0-9]{2})',
-        r'(0[1-9]|[1-2][0-9]|3[01])-(0[1-9]|1[0-2])-(20[0-9]{2})',
-        r'(20[0-9]{2})-(0[1-9]|1[0-2])-(0[1-9]|[12][0-9]|3[01])',
-        # Two-digit year formats (YY)
-        r'(0[1-9]|[1-2][0-9]|3[01])/(0[1-9]|1[0-2])/([0-9]{2})(?=[\s\-:]|$)',
-        r'(0[1-9]|[1-2][0-9]|3[01])\.(0[1-9]|1[0-2])\.([0-9]{2})(?=[\s\-:]|$)',
-        r'(0[1-9]|[1-2][0-9]|3[01])[\s](0[1-9]|1[0-2])[\s]([0-9]{2})(?=[\s\-:]|$)',
-        r'(0[1-9]|[1-2][0-9]|3[01])-(0[1-9]|1[0-2])-([0-9]{2})(?=[\s\-:]|$)',
-        # Month name formats
-        r'(0[1-9]|[1-2][0-9]|3[01])\s[A-Za-z]{3}\.?\s(20[0-9]{2})',
-        r'(?:January|February|March|April|May|June|July|August|September|October|November|December)\s(0[1-9]|1[0-2]),\s(20[0-9]{2})'
-    ]
+    best = None  # (group index, month, year, matched text)
+    for date_match in _DATE_PATTERN.finditer(text):
+        index = _DATE_GROUP_INDEX[date_match.lastgroup]
+        if best is not None and index >= best[0]:
+            continue
+
+        matched_text = date_match.group().strip()
+        fmt = _DATE_FORMAT_BY_GROUP[date_match.lastgroup]
+        try:
+            date_obj = datetime.strptime(matched_text, fmt)
+        except ValueError:
+            continue
+
+        if fmt.endswith('%y'):
+            year = 2000 + (date_obj.year % 100)
+        else:
+            year = date_obj.year
+
+        if min_year <= year <= max_year:
+            best = (index, date_obj.month, year, matched_text)
+            if index == 0:
+                break
+
+    if best is None:
+        return None, None
+
+    _, month, year, matched_text = best
+    verbose_print(f"  → Extracted date: {month:02d}/{year} (from: {matched_text})", CYAN)
+    return month, year
 
-    for date_format in date_formats:
-        date_match = re.search(date_format, text)
-        if date_match:
-            matched_text = date_match.group(0).strip()
-            # Clean up the matched text - remove trailing characters after time separator
-            if '-' in matched_text and ':' in matched_text:
-                # Handle format like "25/04/25-14:14:28" - extract just the date part
-                matched_text = matched_text.split('-')[0].strip()
-            
-            # Try all possible date formats
-            for fmt in ('%d/%m/%Y', '%d.%m.%Y', '%d-%m-%Y', '%d/%m/%y', '%d.%m.%y', '%d-%m-%y', 
-                        '%d %m %Y', '%d %m %y', '%d %b %Y', '%Y-%m-%d'):
-                try:
-                    date_obj = datetime.strptime(matched_text, fmt)
-                    if fmt.endswith('%y'):
-                        year = 2000 + (date_obj.year % 100)
-                    else:
-                        year = date_obj.year
-
-                    if min_year <= year <= max_year:
-                        verbose_print(f"  → Extracted date: {date_obj.month:02d}/{year} (from: {matched_text})", CYAN)
-                        return date_obj.month, year
-                    else:
-                        continue
-                except ValueError:
-                    continue
+
+def extract_date_from_text(text):
+
+    month, year = extract_numeric_date(text)
+    if month is not None:
+        return month, year
 
     french_date = extract_month_from_french(text)
     if french_date:
@@ -246,114 +433,362 @@ def extract_date_from_text(text):
     return None, None
 
 
-def generate_random_suffix(size=3, chars=string.ascii_letters + string.digits):
+def generate_random_suffix(size=3):
+
+    return base64.b32encode(os.urandom(size)).decode('ascii')[:size].lower()
+
+
+def build_keyword_pattern(keywords, undesired_keywords=UNDESIRED_KEYWORDS):
+    """Compile invoice and non-invoice keywords into one alternation.
+
+    Undesired phrases come first and longer keywords before shorter ones, so
+    "ceci n'est pas une facture" is reported as such rather than as "facture".
+    """
+    def alternation(words):
+        unique = {re.escape(word.lower()) for word in words if word}
+        return '|'.join(sorted(unique, key=lambda word: (-len(word), word)))
 
-    return ''.join(random.choice(chars) for _ in range(size))
+    return re.compile(f"(?P<undesired>{alternation(undesired_keywords)})|(?P<desired>{alternation(keywords)})")
 
 
-def contains_undesired_keywords(text, specific_keywords=["ceci n'est pas une facture"]):
+def scan_keywords(text, keyword_pattern):
+    """Scan text once and return (has_invoice_keyword, has_undesired_keyword)."""
+    matched = []
+    for keyword_match in keyword_pattern.finditer(text):
+        if keyword_match.lastgroup == 'undesired':
+            return bool(matched), True
+        matched.append(keyword_match.group())
 
-    return any(keyword.lower() in text for keyword in specific_keywords)
+    if matched and VERBOSE:
+        verbose_print(f"  → Found keywords: {', '.join(dict.fromkeys(matched))}", GREEN)
+    return bool(matched), False
 
 
-def contains_desired_keywords(text, specific_keywords=["facture", "invoice", "rechnung", "facturation", "repas"]):
+@dataclass
+class ParseResult:
+    """What the parse stage learned about one PDF.
 
-    found = any(keyword.lower() in text for keyword in specific_keywords)
-    if found and VERBOSE:
-        matched = [kw for kw in specific_keywords if kw.lower() in text]
-        verbose_print(f"  → Found keywords: {', '.join(matched)}", GREEN)
-    return found
+    Built in a worker process, so it carries only picklable data; the
+    parent attaches the OCR futures and does all moves and statistics.
+    """
+    filepath: str
+    text_chunks: list = field(default_factory=list)  # lower-cased text of each page read
+    needs_ocr_pages: list = field(default_factory=list)  # numbers of the text-less pages to OCR
+    month: Optional[int] = None
+    year: Optional[int] = None
+    is_invoice: bool = False
+    is_undesired: bool = False
+    error: Optional[str] = None
+    error_traceback: Optional[str] = None
+    digest: Optional[str] = None  # SHA-256 of the file contents, the cache key
+    cached: bool = False
+    ocr_futures: list = field(default_factory=list)
 
+    @property
+    def text(self):
+        return ' '.join(self.text_chunks)
 
-def process_pdf_file(filepath, year, keywords, unsorted_files, stats_lock):
 
+def scan_page_text(result, page_text, keyword_pattern):
+    """Fold one page's text into the result's keyword and date findings.
+
+    Returns True once the document can be routed without reading more pages.
+    """
+    result.text_chunks.append(page_text)
+
+    is_invoice, is_undesired = scan_keywords(page_text, keyword_pattern)
+    result.is_invoice = result.is_invoice or is_invoice
+    result.is_undesired = result.is_undesired or is_undesired
+
+    # Only numeric dates per page: the loose French-month fallback runs once on
+    # the whole text in the routing stage, when no page had a numeric date
+    if result.month is None:
+        result.month, result.year = extract_numeric_date(page_text)
+
+    return result.is_undesired or (result.is_invoice and result.month is not None)
+
+
+def open_cache(cache_path):
+    """Open the parse cache at cache_path, creating its table if needed."""
+    global _CACHE
+    _CACHE = sqlite3.connect(cache_path, timeout=30, check_same_thread=False)
+    try:
+        # WAL lets the parse workers read while the parent process writes
+        _CACHE.execute("PRAGMA journal_mode=WAL")
+        _CACHE.execute("PRAGMA synchronous=NORMAL")
+        _CACHE.execute(
+            "CREATE TABLE IF NOT EXISTS parse_results ("
+            "sha256 TEXT PRIMARY KEY, keywords TEXT, month INT, year INT, is_invoice INT, is_undesired INT)"
+        )
+        _CACHE.commit()
+    except sqlite3.Error:
+        close_cache()
+        raise
+
+
+def close_cache():
+
+    global _CACHE
+    if _CACHE is not None:
+        _CACHE.close()
+        _CACHE = None
+
+
+def file_sha256(filepath):
+
+    with open(filepath, 'rb') as f:
+        if hasattr(hashlib, 'file_digest'):
+            # Python 3.11+: hashed entirely in C (SHA-NI accelerated on recent x86)
+            return hashlib.file_digest(f, 'sha256').hexdigest()
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+
+def cache_lookup(digest, keywords):
+    """Return cached (month, year, is_invoice, is_undesired), or None on a miss.
+
+    Entries only count for the keyword set they were computed with.
+    """
+    if _CACHE is None:
+        return None
+    with _CACHE_LOCK:
+        row = _CACHE.execute(
+            "SELECT month, year, is_invoice, is_undesired FROM parse_results WHERE sha256 = ? AND keywords = ?",
+            (digest, keywords)
+        ).fetchone()
+    if row is None:
+        return None
+    month, year, is_invoice, is_undesired = row
+    return month, year, bool(is_invoice), bool(is_undesired)
+
+
+def cache_store(result, keywords):
+
+    if _CACHE is None or result.digest is None:
+        return
+    with _CACHE_LOCK:
+        _CACHE.execute(
+            "INSERT OR REPLACE INTO parse_results VALUES (?, ?, ?, ?, ?, ?)",
+            (result.digest, keywords, result.month, result.year, int(result.is_invoice), int(result.is_undesired))
+        )
+        _CACHE.commit()
+
+
+def init_parse_worker(verbose, cache_path):
+    """Carry the parent's verbosity and cache into a parse worker process."""
+    global VERBOSE
+    VERBOSE = verbose
+    # Each worker opens its own connection; none is inherited from the parent.
+    # A worker that cannot open it simply parses everything, as with --no-cache
+    if cache_path:
+        try:
+            open_cache(cache_path)
+        except sqlite3.Error as e:
+            verbose_print(f"  ⚠ Parse cache unavailable in worker: {e}", YELLOW)
+
+
+def parse_pdf_file(filepath, keyword_pattern):
+    """Stage 1: extract selectable text and pick the text-less pages to OCR.
+
+    Runs in a worker process and must not touch shared state.
+    """
     verbose_print(f"\n{BOLD_WHITE}Processing:{RESET} {os.path.basename(filepath)}", BOLD_WHITE)
 
-    reader = easyocr.Reader(['en'])
-    text = ""
-    ocr_used = False
+    result = ParseResult(filepath)
 
     try:
+        # Hashing reads the whole file, so it is skipped when there is no cache
+        if _CACHE is not None:
+            result.digest = file_sha256(filepath)
+            cached = cache_lookup(result.digest, keyword_pattern.pattern)
+            if cached is not None:
+                verbose_print("  → Using cached result", BLUE)
+                result.month, result.year, result.is_invoice, result.is_undesired = cached
+                result.cached = True
+                return result
+
         with fitz.open(filepath) as pdf:
             verbose_print(f"  → Pages: {len(pdf)}", BLUE)
 
+            found = False
+            ocr_page_numbers = []
+
             for page_number, page in enumerate(pdf):
                 page_text = page.get_text()
-                if page_text:
-                    text += page_text.replace('\n', ' ').lower()
+                if found:
+                    # Already identified as an invoice: only a "not an invoice" phrase on a
+                    # later text page can still change the outcome, so skip OCR and dates
+                    if page_text and scan_keywords(page_text.replace('\n', ' ').lower(), keyword_pattern)[1]:
+                        verbose_print(f"  → Page {page_number + 1}: Non-invoice phrase found", YELLOW)
+                        result.is_undesired = True
+                        break
+                elif page_text:
                     verbose_print(f"  → Page {page_number + 1}: Extracted {len(page_text)} characters", BLUE)
-                else:
-                    verbose_print(f"  → Page {page_number + 1}: No text found, initiating OCR...", YELLOW)
-                    image_list = page.get_images(full=True)
-
-                    for image_index, img in enumerate(image_list):
-                        verbose_print(f"    → OCR processing image {image_index + 1}/{len(image_list)}", CYAN)
-                        xref = img[0]
-                        base_image = pdf.extract_image(xref)
-                        image_bytes = base_image["image"]
-                        image = Image.open(io.BytesIO(image_bytes))
-                        image = image.resize((image.width // 2, image.height // 2), Image.Resampling.LANCZOS)
-                        image_np = np.array(image)
-                        ocr_result = reader.readtext(image_np, detail=0, paragraph=True)
-                        text += ' '.join(ocr_result).replace('\n', ' ').lower()
-                        ocr_used = True
-
-                        month, year_check = extract_date_from_text(text)
-                        if month and (any(keyword.lower() in text for keyword in keywords) or contains_desired_keywords(text)):
+                    if scan_page_text(result, page_text.replace('\n', ' ').lower(), keyword_pattern):
+                        if result.is_undesired:
                             break
+                        verbose_print("  → Keywords and date found, checking remaining text pages for non-invoice phrases only", BLUE)
+                        found = True
+                else:
+                    verbose_print(f"  → Page {page_number + 1}: No text found", YELLOW)
+                    ocr_page_numbers.append(page_number)
+
+            # Only OCR pages if the selectable text was not enough on its own
+            if not (found or result.is_undesired) and ocr_page_numbers:
+                if len(ocr_page_numbers) > MAX_OCR_PAGES:
+                    verbose_print(f"  → OCR limited to the first {MAX_OCR_PAGES} of {len(ocr_page_numbers)} image pages", YELLOW)
+                result.needs_ocr_pages = ocr_page_numbers[:MAX_OCR_PAGES]
+    except Exception as e:
+        result.error = str(e)
+        result.error_traceback = traceback.format_exc()
 
-            if ocr_used:
-                with stats_lock:
-                    STATS['ocr_processed'] += 1
+    return result
 
-            month, year_extracted = extract_date_from_text(text)
 
-            if contains_undesired_keywords(text):
-                target_folder_path = os.path.join(os.getcwd(), "commande")
-                if not DRY_RUN:
-                    os.makedirs(target_folder_path, exist_ok=True)
-                    target_file_path = construct_target_file_path(target_folder_path, filepath)
-                    shutil.move(filepath, target_file_path)
-                print(f"  {YELLOW}→ Moved to 'commande' (non-invoice){RESET}: {os.path.basename(filepath)}")
-                with stats_lock:
-                    STATS['commande_files'] += 1
-                    STATS['sorted_files'] += 1
+def render_ocr_pages(filepath, page_numbers):
+    """Render the given pages in grayscale for OCR, as 2-D uint8 arrays."""
+    images = []
+    with fitz.open(filepath) as pdf:
+        for page_number in page_numbers:
+            verbose_print(f"  → Page {page_number + 1}: Queuing for OCR...", YELLOW)
+            pix = pdf[page_number].get_pixmap(matrix=fitz.Matrix(OCR_RENDER_ZOOM, OCR_RENDER_ZOOM),
+                                              colorspace=fitz.csGRAY, alpha=False)
+            images.append(np.frombuffer(pix.samples, np.uint8).reshape(pix.height, pix.width))
+    return images
 
-            elif any(keyword.lower() in text for keyword in keywords) or contains_desired_keywords(text):
-                if not month:
-                    verbose_print(f"  {RED}✗ No date found{RESET}", RED)
-                    unsorted_files.append(filepath)
-                    with stats_lock:
-                        STATS['unsorted_files'] += 1
-                    return
 
-                target_folder_path = os.path.join(os.getcwd(), str(year_extracted), "Facture fournisseur", f"{month:02d}")
+def queue_for_ocr(result, ocr_batcher, route_queue):
+    """Stage 2 entry: render a result's pages and submit them for OCR, then hand it to routing.
 
-                if not DRY_RUN:
-                    os.makedirs(target_folder_path, exist_ok=True)
-                    target_file_path = construct_target_file_path(target_folder_path, filepath)
-                    shutil.move(filepath, target_file_path)
-                    action = "Moved"
-                else:
-                    action = "Would move"
+    The result reaches the routing stage once every OCR request queued for
+    it has completed (immediately if it needed no OCR).
+    """
+    if result.error is not None or not result.needs_ocr_pages:
+        route_queue.put(result)
+        return
 
-                print(f"  {GREEN}✓ {action}{RESET}: {os.path.basename(filepath)} → {BLUE}{month:02d}/{year_extracted}{RESET}")
-                with stats_lock:
-                    STATS['sorted_files'] += 1
-            else:
-                verbose_print(f"  {YELLOW}⚠ No invoice keywords found{RESET}", YELLOW)
+    # Pages are rendered here rather than in the parse workers: finished parse
+    # results can pile up, so they carry page numbers only, and submit() blocks
+    # on the bounded OCR queue before the next document is rendered
+    try:
+        images = render_ocr_pages(result.filepath, result.needs_ocr_pages)
+    except Exception as e:
+        result.error = str(e)
+        result.error_traceback = traceback.format_exc()
+        route_queue.put(result)
+        return
+
+    result.ocr_futures = [
+        ocr_batcher.submit(result.filepath, page_number, image)
+        for page_number, image in zip(result.needs_ocr_pages, images)
+    ]
+    result.needs_ocr_pages = []
+
+    remaining = [len(result.ocr_futures)]
+    remaining_lock = threading.Lock()
+
+    def on_ocr_done(_future):
+        with remaining_lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last:
+            route_queue.put(result)
+
+    for future in result.ocr_futures:
+        future.add_done_callback(on_ocr_done)
+
+
+def record_failure(filepath, message, details, unsorted_files, stats_lock):
+
+    verbose_print(f"  {RED}✗ Error:{RESET} {message}")
+    if VERBOSE and details:
+        tqdm.write(details.rstrip('\n'))
+    unsorted_files.append(filepath)
+    with stats_lock:
+        STATS['errors'] += 1
+        STATS['unsorted_files'] += 1
+
+
+def route_pdf_file(result, year, keyword_pattern, unsorted_files, stats_lock):
+    """Stage 3: classify the document and move the file into place."""
+    filepath = result.filepath
+
+    if result.error is not None:
+        record_failure(filepath, result.error, result.error_traceback, unsorted_files, stats_lock)
+        return
+
+    try:
+        for future in result.ocr_futures:
+            if scan_page_text(result, future.result().replace('\n', ' ').lower(), keyword_pattern):
+                break
+
+        if result.ocr_futures:
+            with stats_lock:
+                STATS['ocr_processed'] += 1
+
+        # No page had a numeric date: fall back to French month names over the whole text,
+        # which also catches a month name and its year sitting on different pages
+        if result.month is None:
+            result.month, result.year = extract_date_from_text(result.text)
+
+        if not result.cached:
+            cache_store(result, keyword_pattern.pattern)
+
+        month, year_extracted = result.month, result.year
+
+        if result.is_undesired:
+            target_folder_path = os.path.join(os.getcwd(), "commande")
+            if not DRY_RUN:
+                ensure_directory(target_folder_path)
+                target_file_path = construct_target_file_path(target_folder_path, filepath)
+                move_file(filepath, target_file_path)
+            verbose_print(f"  {YELLOW}→ Moved to 'commande' (non-invoice){RESET}: {os.path.basename(filepath)}")
+            with stats_lock:
+                STATS['commande_files'] += 1
+                STATS['sorted_files'] += 1
+
+        elif result.is_invoice:
+            if not month:
+                verbose_print(f"  {RED}✗ No date found{RESET}", RED)
                 unsorted_files.append(filepath)
                 with stats_lock:
                     STATS['unsorted_files'] += 1
+                return
+
+            target_folder_path = os.path.join(os.getcwd(), str(year_extracted), "Facture fournisseur", f"{month:02d}")
+
+            if not DRY_RUN:
+                ensure_directory(target_folder_path)
+                target_file_path = construct_target_file_path(target_folder_path, filepath)
+                move_file(filepath, target_file_path)
+                action = "Moved"
+            else:
+                action = "Would move"
+
+            verbose_print(f"  {GREEN}✓ {action}{RESET}: {os.path.basename(filepath)} → {BLUE}{month:02d}/{year_extracted}{RESET}")
+            with stats_lock:
+                STATS['sorted_files'] += 1
+        else:
+            verbose_print(f"  {YELLOW}⚠ No invoice keywords found{RESET}", YELLOW)
+            unsorted_files.append(filepath)
+            with stats_lock:
+                STATS['unsorted_files'] += 1
 
     except Exception as e:
-        print(f"  {RED}✗ Error:{RESET} {str(e)}")
-        if VERBOSE:
-            traceback.print_exc()
-        unsorted_files.append(filepath)
-        with stats_lock:
-            STATS['errors'] += 1
-            STATS['unsorted_files'] += 1
+        record_failure(filepath, str(e), traceback.format_exc(), unsorted_files, stats_lock)
+
+
+def route_worker(route_queue, year, keyword_pattern, unsorted_files, stats_lock, progress_bar):
+    """Stage 3 worker: route parse results until a None sentinel arrives."""
+    while True:
+        result = route_queue.get()
+        if result is None:
+            break
+
+        route_pdf_file(result, year, keyword_pattern, unsorted_files, stats_lock)
+        progress_bar.update(1)
 
 
 def construct_target_file_path(target_folder_path, filepath):
@@ -367,51 +802,128 @@ def construct_target_file_path(target_folder_path, filepath):
     return target_file_path
 
 
+def ensure_directory(path):
+    """Create a target folder once per run; later calls skip the makedirs syscalls."""
+    if path in _CREATED_DIRS:
+        return
+    os.makedirs(path, exist_ok=True)
+    with _CREATED_DIRS_LOCK:
+        _CREATED_DIRS.add(path)
+
+
+def move_file(filepath, target_file_path):
+    """Move a file, renaming it in place when both paths share a filesystem."""
+    try:
+        os.replace(filepath, target_file_path)
+    except OSError:
+        # Cross-device move: fall back to copy + delete
+        shutil.move(filepath, target_file_path)
+
+
+def iter_pdf_files(path, depth=0, max_depth=2):
+    """Yield PDF paths under path, skipping 'commande' and year folders."""
+    subdirs = []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name.lower() != "commande" and not _YEAR_PATTERN.fullmatch(entry.name):
+                        subdirs.append(entry.path)
+                elif entry.name[-4:].lower() == '.pdf' and entry.is_file(follow_symlinks=False):
+                    yield entry.path
+    except OSError as e:
+        verbose_print(f"  Skipping {path}: {e}", YELLOW)
+        return
+
+    if depth < max_depth:
+        for subdir in subdirs:
+            yield from iter_pdf_files(subdir, depth + 1, max_depth)
+
+
 def find_pdf_files(directory, max_depth=2):
 
     print(f"\n{BOLD_WHITE}Scanning for PDF files...{RESET}")
     pdf_files = []
-    year_pattern = re.compile(r'^20\d{2}$')
-
-    for root, dirs, files in os.walk(directory):
-        current_level = root.count(os.path.sep)
-        start_level = directory.rstrip(os.path.sep).count(os.path.sep)
 
-        if current_level - start_level > max_depth:
-            dirs[:] = []
-        else:
-            dirs[:] = [d for d in dirs if d.lower() != "commande" and not year_pattern.fullmatch(d)]
-            for file in files:
-                if file.lower().endswith('.pdf'):
-                    pdf_files.append(os.path.join(root, file))
-                    verbose_print(f"  Found: {file}", CYAN)
+    for pdf_path in iter_pdf_files(directory, max_depth=max_depth):
+        pdf_files.append(pdf_path)
+        verbose_print(f"  Found: {os.path.basename(pdf_path)}", CYAN)
 
     return pdf_files
 
 
-def unzip_files_in_directory(directory):
+def extract_zip_file(zip_path, directory):
+    """Extract zip_path into a fresh staging folder inside directory and return its path.
+
+    Each archive gets its own folder because concurrent extractall() calls into
+    one directory race on creating the same parent folders.
+    """
+    staging_dir = tempfile.mkdtemp(prefix='.unzip-', dir=directory)
+    try:
+        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            zip_ref.extractall(staging_dir)
+    except BaseException:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+    return staging_dir
+
+
+def merge_directory(source_dir, target_dir):
+    """Move the contents of source_dir into target_dir, overwriting files like extractall() does."""
+    for root, dirs, files in os.walk(source_dir):
+        target_root = os.path.join(target_dir, os.path.relpath(root, source_dir))
+        os.makedirs(target_root, exist_ok=True)
+        for name in files:
+            os.replace(os.path.join(root, name), os.path.join(target_root, name))
+
+
+def unzip_files_in_directory(directory, stats_lock):
 
     zip_files = [f for f in os.listdir(directory) if f.endswith('.zip')]
 
     if zip_files:
         print(f"\n{BOLD_WHITE}Extracting ZIP files...{RESET}")
-        for filename in zip_files:
-            zip_path = os.path.join(directory, filename)
-            print(f"  → Unzipping: {CYAN}{filename}{RESET}")
-            try:
-                with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                    zip_ref.extractall(directory)
-                print(f"  {GREEN}✓ Extracted{RESET}: {filename}")
-                STATS['zip_extracted'] += 1
-            except Exception as e:
-                print(f"  {RED}✗ Error extracting {filename}: {e}{RESET}")
+        # zlib releases the GIL while inflating, so archives extract in parallel;
+        # merging and status output stay on this thread, in archive order
+        with ThreadPoolExecutor(max_workers=(os.cpu_count() or 1)) as executor:
+            futures = [executor.submit(extract_zip_file, os.path.join(directory, filename), directory)
+                       for filename in zip_files]
+
+            for filename, future in zip(zip_files, futures):
+                print(f"  → Unzipping: {CYAN}{filename}{RESET}")
+                staging_dir = None
+                try:
+                    staging_dir = future.result()
+                    merge_directory(staging_dir, directory)
+                    print(f"  {GREEN}✓ Extracted{RESET}: {filename}")
+                    with stats_lock:
+                        STATS['zip_extracted'] += 1
+                except Exception as e:
+                    print(f"  {RED}✗ Error extracting {filename}: {e}{RESET}")
+                finally:
+                    if staging_dir:
+                        shutil.rmtree(staging_dir, ignore_errors=True)
 
 
 def delete_empty_folders(directory, max_depth=2):
 
+    start_level = directory.rstrip(os.path.sep).count(os.path.sep)
+    candidates = []
+    for root, dirs, files in os.walk(directory):
+        if root.count(os.path.sep) - start_level >= max_depth:
+            dirs[:] = []
+        if root != directory:
+            candidates.append(root)
+
+    # Deepest folders first, so parents emptied by the cleanup are removed too
     deleted_count = 0
-    for root, dirs, files in os.walk(directory, topdown=False):
-        if root != directory and (not os.listdir(root)):
+    for root in reversed(candidates):
+        try:
+            with os.scandir(root) as entries:
+                is_empty = next(entries, None) is None
+        except OSError:
+            continue
+        if is_empty:
             verbose_print(f"  Deleting empty folder: {root}", YELLOW)
             if not DRY_RUN:
                 os.rmdir(root)
@@ -464,6 +976,7 @@ def parse_arguments():
     parser.add_argument('-d', '--dry-run', action='store_true', help='Preview without moving files')
     parser.add_argument('--version', action='store_true', help='Show version')
     parser.add_argument('--stats', action='store_true', help='Show detailed statistics')
+    parser.add_argument('--no-cache', action='store_true', help='Do not read or write the parse cache')
     parser.add_argument('args', nargs='*', help='Year and keywords')
 
     return parser.parse_args()
@@ -503,10 +1016,16 @@ def main():
 
     print(f"{BOLD_WHITE}Keywords:{RESET} {', '.join(keywords)}\n")
 
+    keyword_pattern = build_keyword_pattern(keywords + DESIRED_KEYWORDS)
+
     STATS['start_time'] = time.time()
 
+    # Thread-safe lock for statistics
+    from threading import Lock
+    stats_lock = Lock()
+
     # Extract ZIP files
-    unzip_files_in_directory(os.getcwd())
+    unzip_files_in_directory(os.getcwd(), stats_lock)
 
     # Find PDF files
     pdf_files = find_pdf_files(os.getcwd())
@@ -523,22 +1042,58 @@ def main():
 
     unsorted_files = []
 
-    # Thread-safe lock for statistics
-    from threading import Lock
-    stats_lock = Lock()
+    # Parse results of previous runs, keyed by file contents. The database is
+    # created now but no connection is held while the workers are forked:
+    # SQLite handles must never cross fork(). A dry run leaves no file behind,
+    # and a cache that cannot be opened is skipped as with --no-cache
+    cache_path = None
+    if not (args.no_cache or DRY_RUN):
+        cache_path = os.path.join(os.getcwd(), CACHE_FILENAME)
+        try:
+            open_cache(cache_path)
+        except sqlite3.Error as e:
+            print(f"{YELLOW}⚠ Parse cache unavailable, continuing without it: {e}{RESET}")
+            cache_path = None
+        close_cache()
+
+    # Three-stage pipeline: parse (worker processes) → OCR batching → move.
+    # The process pool comes first: submitting starts the workers, and they
+    # must be forked before this process runs any threads of its own
+    with ProcessPoolExecutor(max_workers=(os.cpu_count() or 1),
+                             initializer=init_parse_worker, initargs=(VERBOSE, cache_path)) as parsers:
+        futures = {parsers.submit(parse_pdf_file, pdf, keyword_pattern): pdf for pdf in pdf_files}
+
+        # The workers exist now, so the parent can open its own cache connection
+        if cache_path:
+            try:
+                open_cache(cache_path)
+            except sqlite3.Error as e:
+                print(f"{YELLOW}⚠ Parse cache unavailable, results will not be saved: {e}{RESET}")
 
-    # Process files with thread pool
-    with ThreadPoolExecutor(max_workers=(os.cpu_count()*2 or 1)) as executor:
-        futures = {
-            executor.submit(process_pdf_file, pdf, year, keywords, unsorted_files, stats_lock): pdf
-            for pdf in pdf_files
-        }
-
-        completed = 0
-        for future in as_completed(futures):
-            completed += 1
-            progress = (completed / STATS['total_files']) * 100
-            print(f"\n{CYAN}Progress: {completed}/{STATS['total_files']} ({progress:.1f}%){RESET}")
+        route_queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        ocr_batcher = OCRBatcher()
+        progress_bar = tqdm(total=STATS['total_files'], unit='file', desc='Sorting')
+
+        with progress_bar, ThreadPoolExecutor(max_workers=MOVE_WORKERS) as movers:
+            for _ in range(MOVE_WORKERS):
+                movers.submit(route_worker, route_queue, year, keyword_pattern, unsorted_files, stats_lock, progress_bar)
+
+            try:
+                # OCR and moves stay in this process
+                for future in as_completed(futures):
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = ParseResult(futures[future], error=str(e))
+                    queue_for_ocr(result, ocr_batcher, route_queue)
+            finally:
+                # Flush the OCR stage, then stop the movers, even on errors or Ctrl-C;
+                # otherwise the movers' executor waits forever on route_queue.get()
+                ocr_batcher.close()
+                for _ in range(MOVE_WORKERS):
+                    route_queue.put(None)
+
+    close_cache()
 
     # Clean up empty folders
     if not DRY_RUN:
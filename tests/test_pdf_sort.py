@@ -0,0 +1,197 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pdf_sort  # noqa: E402
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("facture du 25/04/2025", (4, 2025)),
+    ("le 25.04.2025", (4, 2025)),
+    ("le 25-04-2025", (4, 2025)),
+    ("le 25 04 2025", (4, 2025)),
+    ("2025-02-14 paiement", (2, 2025)),
+    ("ticket 25/04/25-14:14:28", (4, 2025)),
+    ("du 14-02-25 43:52:10", (2, 2025)),
+    ("emise le 13 jul 2023", (7, 2023)),
+    ("paid march 05, 2024", (3, 2024)),
+    ("janvier 2024", (1, 2024)),
+    ("aucune date ici", (None, None)),
+])
+def test_extract_date_from_text_formats(text, expected):
+    assert pdf_sort.extract_date_from_text(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    # "01 02 03" reads as dd mm yy but must not beat the real date
+    ("tel 01 02 03 04 05 facture n° 42 date 15/03/2024", (3, 2024)),
+    ("siret 12 05 18 facture du 03/09/2024", (9, 2024)),
+])
+def test_extract_date_from_text_header_digits_do_not_beat_later_date(text, expected):
+    assert pdf_sort.extract_date_from_text(text) == expected
+
+
+def test_extract_date_from_text_earliest_date_wins_within_format():
+    assert pdf_sort.extract_date_from_text("commande 01/02/2024, livraison 25/04/2025") == (2, 2024)
+
+
+def test_extract_date_from_text_skips_out_of_range_matches():
+    assert pdf_sort.extract_date_from_text("valable jusqu'au 31/12/2099, emise le 01/02/2024") == (2, 2024)
+
+
+def test_extract_date_from_text_skips_unparseable_matches():
+    # '31/02/2024' matches the pattern but is not a real date
+    assert pdf_sort.extract_date_from_text("31/02/2024 puis 15/03/2024") == (3, 2024)
+
+
+def test_extract_numeric_date_ignores_french_months():
+    assert pdf_sort.extract_numeric_date("contact email: compta@acme.fr 2023") == (None, None)
+
+
+def test_scan_page_text_prefers_numeric_date_on_later_page():
+    keyword_pattern = pdf_sort.build_keyword_pattern(pdf_sort.DESIRED_KEYWORDS)
+    result = pdf_sort.ParseResult("invoice.pdf")
+
+    # "email" contains "mai", which must not settle the date on page 1
+    assert not pdf_sort.scan_page_text(result, "facture n° 2023 - contact email: compta@acme.fr", keyword_pattern)
+    assert result.month is None
+
+    assert pdf_sort.scan_page_text(result, "date de facturation : 15/03/2024", keyword_pattern)
+    assert (result.month, result.year) == (3, 2024)
+
+
+@pytest.fixture
+def keyword_pattern():
+    return pdf_sort.build_keyword_pattern(["ticket", "Justificatif"] + pdf_sort.DESIRED_KEYWORDS)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("votre facture du mois", (True, False)),
+    ("justificatif de paiement", (True, False)),
+    ("rien a signaler", (False, False)),
+    ("ceci n'est pas une facture", (False, True)),
+    ("facture pro forma - ceci n'est pas une facture", (True, True)),
+])
+def test_scan_keywords(keyword_pattern, text, expected):
+    assert pdf_sort.scan_keywords(text, keyword_pattern) == expected
+
+
+def test_build_keyword_pattern_prefers_undesired_and_longer_keywords(keyword_pattern):
+    # The undesired phrase wins over the "facture" it contains
+    assert keyword_pattern.search("ceci n'est pas une facture").lastgroup == 'undesired'
+    # "facturation" is matched whole rather than as "facture" + "tion"
+    assert keyword_pattern.search("facturation").group() == "facturation"
+
+
+def test_build_keyword_pattern_ignores_empty_keywords():
+    pattern = pdf_sort.build_keyword_pattern(["", "invoice"])
+    assert pdf_sort.scan_keywords("nothing relevant", pattern) == (False, False)
+
+
+def test_build_keyword_pattern_is_deterministic():
+    keywords = ["ticket", "repas", "invoice", "facture"]
+    assert pdf_sort.build_keyword_pattern(keywords).pattern == pdf_sort.build_keyword_pattern(keywords[::-1]).pattern
+
+
+@pytest.fixture
+def cache(tmp_path):
+    pdf_sort.open_cache(str(tmp_path / pdf_sort.CACHE_FILENAME))
+    yield
+    pdf_sort.close_cache()
+
+
+def test_cache_round_trip(cache):
+    result = pdf_sort.ParseResult("a.pdf", month=3, year=2024, is_invoice=True, digest="abc")
+    pdf_sort.cache_store(result, "keywords")
+
+    assert pdf_sort.cache_lookup("abc", "keywords") == (3, 2024, True, False)
+
+
+def test_cache_lookup_misses(cache):
+    result = pdf_sort.ParseResult("a.pdf", is_undesired=True, digest="abc")
+    pdf_sort.cache_store(result, "keywords")
+
+    assert pdf_sort.cache_lookup("abc", "keywords") == (None, None, False, True)
+    assert pdf_sort.cache_lookup("abc", "other keywords") is None
+    assert pdf_sort.cache_lookup("def", "keywords") is None
+
+
+def test_cache_store_replaces_entry(cache):
+    pdf_sort.cache_store(pdf_sort.ParseResult("a.pdf", digest="abc"), "keywords")
+    pdf_sort.cache_store(pdf_sort.ParseResult("a.pdf", month=1, year=2025, is_invoice=True, digest="abc"), "keywords")
+
+    assert pdf_sort.cache_lookup("abc", "keywords") == (1, 2025, True, False)
+
+
+def test_cache_disabled_without_connection():
+    pdf_sort.cache_store(pdf_sort.ParseResult("a.pdf", digest="abc"), "keywords")
+    assert pdf_sort.cache_lookup("abc", "keywords") is None
+
+
+def test_file_sha256_matches_hashlib(tmp_path):
+    import hashlib
+
+    path = tmp_path / "a.pdf"
+    path.write_bytes(b"%PDF-1.4 test" * 100000)
+    assert pdf_sort.file_sha256(str(path)) == hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def test_unzip_files_in_directory_merges_shared_folders(tmp_path):
+    import threading
+    import zipfile
+
+    for i in range(8):
+        with zipfile.ZipFile(tmp_path / f"batch{i}.zip", "w") as zip_ref:
+            for j in range(20):
+                zip_ref.writestr(f"scans/{j}/invoice{i}.pdf", b"%PDF-1.4")
+    (tmp_path / "broken.zip").write_bytes(b"not a zip")
+
+    pdf_sort.unzip_files_in_directory(str(tmp_path), threading.Lock())
+
+    assert sum(len(files) for _, _, files in os.walk(tmp_path / "scans")) == 8 * 20
+    assert not [name for name in os.listdir(tmp_path) if name.startswith(".unzip-")]
+
+
+def test_parse_pdf_file_returns_page_numbers_for_ocr(tmp_path):
+    import fitz
+
+    path = str(tmp_path / "scan.pdf")
+    with fitz.open() as pdf:
+        for _ in range(pdf_sort.MAX_OCR_PAGES + 2):
+            pdf.new_page()
+        pdf.save(path)
+
+    result = pdf_sort.parse_pdf_file(path, pdf_sort.build_keyword_pattern(pdf_sort.DESIRED_KEYWORDS))
+
+    # Rendering is left to the OCR stage, so the worker's result stays small
+    assert result.error is None
+    assert result.needs_ocr_pages == list(range(pdf_sort.MAX_OCR_PAGES))
+
+
+def test_open_cache_failure_leaves_cache_disabled(tmp_path):
+    import sqlite3
+
+    path = tmp_path / pdf_sort.CACHE_FILENAME
+    path.write_bytes(b"not a database" * 100)
+
+    with pytest.raises(sqlite3.Error):
+        pdf_sort.open_cache(str(path))
+    assert pdf_sort._CACHE is None
+
+
+def test_parse_pdf_file_skips_hashing_without_cache(tmp_path, monkeypatch):
+    import fitz
+
+    path = str(tmp_path / "invoice.pdf")
+    with fitz.open() as pdf:
+        pdf.new_page().insert_text((50, 50), "facture du 15/03/2024")
+        pdf.save(path)
+
+    monkeypatch.setattr(pdf_sort, "file_sha256", lambda _: pytest.fail("hashed without a cache"))
+    result = pdf_sort.parse_pdf_file(path, pdf_sort.build_keyword_pattern(pdf_sort.DESIRED_KEYWORDS))
+
+    assert result.digest is None
+    assert (result.month, result.year, result.is_invoice) == (3, 2024, True)